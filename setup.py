@@ -3,9 +3,10 @@
 from setuptools import setup, find_packages
 from pathlib import Path
 
-# Read the README file
+# Read the README file (optional, so installs from a bare checkout still work)
 this_directory = Path(__file__).parent
-long_description = (this_directory / "README.md").read_text(encoding="utf-8")
+readme = this_directory / "README.md"
+long_description = readme.read_text(encoding="utf-8") if readme.exists() else ""
 
 setup(
     name="streamlog",
@@ -36,6 +37,10 @@ setup(
         "pydantic>=2.0.0",
     ],
     extras_require={
+        "fast": [
+            "numba>=0.57.0",
+            "numpy>=1.22.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "httpx>=0.25.0",
@@ -2,18 +2,22 @@
 StreamLog API Server - FastAPI-based message broker API.
 
 Provides HTTP endpoints for producing and consuming messages from topics.
+
+Storage calls block on disk I/O, so the async endpoints hand them to a
+worker thread with asyncio.to_thread() instead of stalling the event loop.
 """
 
+import asyncio
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Optional
-import sys
-from pathlib import Path
-
-# Add src to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+from typing import AsyncIterator, Iterable, List, Optional
 
+# Requires the package to be installed (pip install -e .), which puts the
+# src/ packages on the import path
 from storage.partition import Partition
+from storage.segment import LogSegment
+from storage.registry import TopicRegistry
 
 
 # Pydantic models for request/response validation
@@ -30,6 +34,19 @@ class ProduceResponse(BaseModel):
     offset: int
 
 
+class ProduceBatchRequest(BaseModel):
+    """Request model for producing a batch of messages."""
+    topic: str
+    messages: List[str]
+
+
+class ProduceBatchResponse(BaseModel):
+    """Response model for batch produce operation."""
+    topic: str
+    partition: int
+    offsets: List[int]
+
+
 class ConsumeResponse(BaseModel):
     """Response model for consume operation."""
     topic: str
@@ -62,14 +79,22 @@ app = FastAPI(
 
 
 # Global state: Topic management
-# In production, this would be a proper TopicManager class with persistence
-topics: Dict[str, Partition] = {}
+# Partitions are sharded by (topic, partition_id) so unrelated topics never
+# contend on the same lock. Smaller segment size for easy testing; in
+# production, this would be configurable
+registry = TopicRegistry(segment_size_limit=10 * 1024)  # 10KB for easy testing
+
+# Size of the slices binary endpoints stream out of the segment mmaps
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
-def get_or_create_partition(topic: str, partition_id: int = 0) -> Partition:
+async def get_or_create_partition(topic: str, partition_id: int = 0) -> Partition:
     """
     Get an existing partition or create a new one.
     
+    Creating a partition loads its segments from disk, so that happens in a
+    worker thread; existing partitions are returned directly.
+    
     Args:
         topic: Topic name
         partition_id: Partition ID (default: 0)
@@ -77,14 +102,30 @@ def get_or_create_partition(topic: str, partition_id: int = 0) -> Partition:
     Returns:
         Partition instance
     """
-    key = f"{topic}-{partition_id}"
+    partition = registry.get(topic, partition_id)
+    
+    if partition is None:
+        partition = await asyncio.to_thread(registry.get_or_create, topic, partition_id)
+    
+    return partition
+
+
+async def iter_chunks(views: Iterable[memoryview],
+                      chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[memoryview]:
+    """
+    Stream zero-copy views in fixed-size slices.
     
-    if key not in topics:
-        # Create new partition with smaller segment size for testing
-        # In production, this would be configurable
-        topics[key] = Partition(topic, partition_id, segment_size_limit=10 * 1024)  # 10KB for easy testing
+    Slicing a memoryview copies nothing, so memory use stays flat no matter
+    how large the message is. An async generator keeps StreamingResponse
+    from hopping to the threadpool for every chunk.
     
-    return topics[key]
+    Args:
+        views: memoryviews into segment mmaps
+        chunk_size: Maximum size of each yielded slice
+    """
+    for view in views:
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size]
 
 
 @app.get("/", response_model=HealthResponse)
@@ -97,18 +138,23 @@ async def health_check():
     """
     return HealthResponse(
         status="healthy",
-        topics=len(set(p.topic for p in topics.values())),
-        partitions=len(topics)
+        topics=registry.topic_count(),
+        partitions=len(registry)
     )
 
 
 @app.post("/produce", response_model=ProduceResponse)
-async def produce(request: ProduceRequest):
+async def produce(request: ProduceRequest, durable: bool = False):
     """
     Produce a message to a topic.
     
+    The offset is returned as soon as the message is written; the partition's
+    background flusher syncs it to disk shortly after. Pass durable=true (or
+    durable=1) to wait for that sync before responding.
+    
     Args:
         request: ProduceRequest with topic and message
+        durable: Wait for the write to be synced to disk before returning
         
     Returns:
         ProduceResponse with assigned offset
@@ -129,13 +175,18 @@ async def produce(request: ProduceRequest):
     """
     try:
         # Get or create partition
-        partition = get_or_create_partition(request.topic)
+        partition = await get_or_create_partition(request.topic)
         
         # Convert message to bytes and produce
         message_bytes = request.message.encode('utf-8')
-        offset = partition.produce(message_bytes)
+        offset = await asyncio.to_thread(partition.produce, message_bytes)
+        
+        # Hand the write to the group-commit flusher
+        partition.flusher.notify(LogSegment.record_size(message_bytes))
+        if durable:
+            await partition.flusher.wait_flushed()
         
-        return ProduceResponse(
+        return ProduceResponse.model_construct(
             topic=request.topic,
             partition=0,
             offset=offset
@@ -145,6 +196,55 @@ async def produce(request: ProduceRequest):
         raise HTTPException(status_code=500, detail=f"Failed to produce message: {str(e)}")
 
 
+@app.post("/produce_batch", response_model=ProduceBatchResponse)
+async def produce_batch(request: ProduceBatchRequest):
+    """
+    Produce a batch of messages to a topic.
+    
+    The whole batch is written in one go, which is much cheaper
+    than one /produce call per message.
+    
+    Args:
+        request: ProduceBatchRequest with topic and messages
+        
+    Returns:
+        ProduceBatchResponse with the assigned offsets
+        
+    Example:
+        POST /produce_batch
+        {
+            "topic": "events",
+            "messages": ["first", "second"]
+        }
+        
+        Response:
+        {
+            "topic": "events",
+            "partition": 0,
+            "offsets": [42, 43]
+        }
+    """
+    try:
+        # Get or create partition
+        partition = await get_or_create_partition(request.topic)
+        
+        # Convert messages to bytes and produce them together
+        messages = [message.encode('utf-8') for message in request.messages]
+        offsets = await asyncio.to_thread(partition.produce_batch, messages)
+        
+        # Let the group-commit flusher sync the batch to disk
+        partition.flusher.notify(sum(LogSegment.record_size(message) for message in messages))
+        
+        return ProduceBatchResponse.model_construct(
+            topic=request.topic,
+            partition=0,
+            offsets=offsets
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to produce messages: {str(e)}")
+
+
 @app.get("/consume", response_model=ConsumeResponse)
 async def consume(topic: str, offset: int, partition: int = 0):
     """
@@ -171,18 +271,18 @@ async def consume(topic: str, offset: int, partition: int = 0):
     """
     try:
         # Get partition
-        key = f"{topic}-{partition}"
+        partition_obj = registry.get(topic, partition)
         
-        if key not in topics:
+        if partition_obj is None:
             raise HTTPException(status_code=404, detail=f"Topic '{topic}' not found")
         
-        partition_obj = topics[key]
-        
-        # Consume message
-        message_bytes = partition_obj.consume(offset)
+        # Serve cache hits on the loop; only a miss needs a worker thread
+        message_bytes = partition_obj.cached(offset)
+        if message_bytes is None:
+            message_bytes = await asyncio.to_thread(partition_obj.consume, offset)
         message = message_bytes.decode('utf-8')
         
-        return ConsumeResponse(
+        return ConsumeResponse.model_construct(
             topic=topic,
             partition=partition,
             offset=offset,
@@ -195,6 +295,93 @@ async def consume(topic: str, offset: int, partition: int = 0):
         raise HTTPException(status_code=500, detail=f"Failed to consume message: {str(e)}")
 
 
+@app.get("/consume_raw")
+async def consume_raw(topic: str, offset: int, partition: int = 0):
+    """
+    Consume a single message as raw bytes.
+    
+    Skips the UTF-8 decode and JSON encoding of /consume, so binary payloads
+    come back untouched. The body is streamed straight out of the segment's
+    mmap without being copied into memory first.
+    
+    Args:
+        topic: Topic name
+        offset: Offset to read from
+        partition: Partition ID (default: 0)
+        
+    Returns:
+        The message body as application/octet-stream, with the offset in
+        the X-Offset header
+    """
+    try:
+        # Get partition
+        partition_obj = registry.get(topic, partition)
+        
+        if partition_obj is None:
+            raise HTTPException(status_code=404, detail=f"Topic '{topic}' not found")
+        
+        message_view = await asyncio.to_thread(partition_obj.consume_view, offset)
+        
+        return StreamingResponse(
+            iter_chunks([message_view]),
+            media_type="application/octet-stream",
+            headers={"X-Offset": str(offset), "Content-Length": str(len(message_view))}
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to consume message: {str(e)}")
+
+
+@app.get("/consume_range")
+async def consume_range(topic: str, offset: int, max_messages: int = 100, partition: int = 0):
+    """
+    Consume up to max_messages consecutive messages as a binary stream.
+    
+    The body is the messages in their on-disk framing: for each message a
+    4-byte big-endian length followed by the message bytes.
+    
+    Args:
+        topic: Topic name
+        offset: First offset to read
+        max_messages: Maximum number of messages to return (default: 100)
+        partition: Partition ID (default: 0)
+        
+    Returns:
+        Length-prefixed messages as application/octet-stream, with the first
+        offset in X-Offset and the number of messages in X-Count
+    """
+    if max_messages < 1:
+        raise HTTPException(status_code=400, detail="max_messages must be at least 1")
+    
+    try:
+        # Get partition
+        partition_obj = registry.get(topic, partition)
+        
+        if partition_obj is None:
+            raise HTTPException(status_code=404, detail=f"Topic '{topic}' not found")
+        
+        views, count = await asyncio.to_thread(
+            partition_obj.consume_range, offset, max_messages
+        )
+        
+        return StreamingResponse(
+            iter_chunks(views),
+            media_type="application/octet-stream",
+            headers={"X-Offset": str(offset), "X-Count": str(count)}
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to consume messages: {str(e)}")
+
+
 @app.get("/topics/{topic}/info", response_model=dict)
 async def get_topic_info(topic: str, partition: int = 0):
     """
@@ -207,13 +394,12 @@ async def get_topic_info(topic: str, partition: int = 0):
     Returns:
         Detailed partition information including segment details
     """
-    key = f"{topic}-{partition}"
+    partition_obj = registry.get(topic, partition)
     
-    if key not in topics:
+    if partition_obj is None:
         raise HTTPException(status_code=404, detail=f"Topic '{topic}' not found")
     
-    partition_obj = topics[key]
-    return partition_obj.get_segment_info()
+    return await asyncio.to_thread(partition_obj.get_segment_info)
 
 
 @app.get("/topics")
@@ -224,7 +410,7 @@ async def list_topics():
     Returns:
         List of topic names
     """
-    unique_topics = list(set(p.topic for p in topics.values()))
+    unique_topics = registry.topics()
     return {"topics": unique_topics, "count": len(unique_topics)}
 
 
@@ -238,29 +424,28 @@ async def delete_topic(topic: str):
     Args:
         topic: Topic name
     """
-    keys_to_delete = [k for k in topics.keys() if k.startswith(f"{topic}-")]
+    partitions_to_close = registry.remove_topic(topic)
     
-    if not keys_to_delete:
+    if not partitions_to_close:
         raise HTTPException(status_code=404, detail=f"Topic '{topic}' not found")
     
     # Close all partitions for this topic
-    for key in keys_to_delete:
-        topics[key].close()
-        del topics[key]
+    for partition_obj in partitions_to_close:
+        await asyncio.to_thread(partition_obj.close)
     
-    return {"message": f"Topic '{topic}' closed", "partitions_closed": len(keys_to_delete)}
+    return {"message": f"Topic '{topic}' closed", "partitions_closed": len(partitions_to_close)}
 
 
 # Cleanup on shutdown
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close all partitions on shutdown."""
-    for partition in topics.values():
+    for partition in registry.partitions():
         partition.close()
 
 
-# For running the server directly
-if __name__ == "__main__":
+def main():
+    """Run the server (the streamlog-server console script)."""
     import uvicorn
     
     print("=" * 60)
@@ -271,3 +456,8 @@ if __name__ == "__main__":
     print("=" * 60)
     
     uvicorn.run(app, host="0.0.0.0", port=8000)
+
+
+# For running the server directly (python -m api.server)
+if __name__ == "__main__":
+    main()
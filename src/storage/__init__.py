@@ -2,5 +2,7 @@
 
 from .segment import LogSegment
 from .partition import Partition
+from .flusher import BackgroundFlusher
+from .registry import TopicRegistry
 
-__all__ = ["LogSegment", "Partition"]
+__all__ = ["LogSegment", "Partition", "BackgroundFlusher", "TopicRegistry"]
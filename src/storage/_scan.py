@@ -0,0 +1,182 @@
+"""
+Scanners over the raw bytes of a .log file.
+
+Walking the length prefixes of a segment is a tight loop that the Python
+interpreter runs one message at a time. When numba (and numpy) are
+installed, the loops are compiled to machine code instead; otherwise the
+pure-Python versions below are used with identical results.
+
+- count_messages: count complete entries (offset recovery on startup)
+- sparse_index: rebuild index entries (segments with a missing or
+  lagging .index file)
+"""
+
+import struct
+from typing import List, Tuple
+
+try:
+    import numba
+    import numpy as np
+except ImportError:  # Optional speedup, fall back to pure Python
+    numba = None
+    np = None
+
+
+# Log entry length prefix (4-byte big-endian unsigned int)
+_LEN_STRUCT = struct.Struct(">I")
+
+
+def _count_messages_py(buf, size: int) -> Tuple[int, int]:
+    """Pure-Python length-prefix walk (see count_messages)."""
+    message_count = 0
+    position = 0
+    
+    # Stop when a full length prefix no longer fits (end of file or corrupted)
+    while position + 4 <= size:
+        message_length = _LEN_STRUCT.unpack_from(buf, position)[0]
+        
+        # Torn write: the body was cut short
+        if position + 4 + message_length > size:
+            break
+        
+        position += 4 + message_length
+        message_count += 1
+    
+    return message_count, position
+
+
+def _sparse_index_py(buf, size: int, position: int, interval: int,
+                     bytes_since_index: int, index_first: bool) -> Tuple[List[int], List[int], int]:
+    """Pure-Python index rebuild (see sparse_index)."""
+    relative_offsets = []
+    positions = []
+    relative_offset = 0
+    
+    while position + 4 <= size:
+        message_length = _LEN_STRUCT.unpack_from(buf, position)[0]
+        if position + 4 + message_length > size:
+            break
+        
+        bytes_since_index += 4 + message_length
+        
+        # Same policy as LogSegment.append(): first message, then every interval bytes
+        if index_first or bytes_since_index >= interval:
+            relative_offsets.append(relative_offset)
+            positions.append(position)
+            bytes_since_index = 0
+            index_first = False
+        
+        position += 4 + message_length
+        relative_offset += 1
+    
+    return relative_offsets, positions, bytes_since_index
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _read_length(buf, position):
+        # Decode the big-endian u32 by hand, widened to int64 so the
+        # position arithmetic never leaves integer types
+        return (
+            (np.int64(buf[position]) << 24)
+            | (np.int64(buf[position + 1]) << 16)
+            | (np.int64(buf[position + 2]) << 8)
+            | np.int64(buf[position + 3])
+        )
+    
+    @numba.njit(cache=True)
+    def _count_messages_jit(buf, size):
+        message_count = 0
+        position = 0
+        
+        while position + 4 <= size:
+            end = position + 4 + _read_length(buf, position)
+            if end > size:
+                break
+            
+            position = end
+            message_count += 1
+        
+        return message_count, position
+    
+    @numba.njit(cache=True)
+    def _sparse_index_jit(buf, size, position, interval, bytes_since_index, index_first):
+        # Every entry after the first needs at least interval bytes
+        capacity = (size - position) // interval + 2
+        relative_offsets = np.empty(capacity, dtype=np.int64)
+        positions = np.empty(capacity, dtype=np.int64)
+        count = 0
+        relative_offset = 0
+        
+        while position + 4 <= size:
+            message_length = _read_length(buf, position)
+            if position + 4 + message_length > size:
+                break
+            
+            bytes_since_index += 4 + message_length
+            
+            if index_first or bytes_since_index >= interval:
+                relative_offsets[count] = relative_offset
+                positions[count] = position
+                count += 1
+                bytes_since_index = 0
+                index_first = False
+            
+            position += 4 + message_length
+            relative_offset += 1
+        
+        return relative_offsets[:count], positions[:count], bytes_since_index
+
+
+def count_messages(buf, size: int) -> Tuple[int, int]:
+    """
+    Count the complete length-prefixed entries in the first size bytes of buf.
+    
+    The walk stops at the first entry that does not fit entirely within size
+    bytes (a torn write), so the returned end position is where the last
+    complete entry finishes.
+    
+    Args:
+        buf: Any object supporting the buffer protocol (e.g. an mmap)
+        size: Number of bytes of buf to scan
+        
+    Returns:
+        Tuple of (number of complete entries, byte position after the last one)
+    """
+    if numba is None or size == 0:
+        return _count_messages_py(buf, size)
+    
+    # Zero-copy uint8 view; released when this function returns
+    message_count, end = _count_messages_jit(np.frombuffer(buf, dtype=np.uint8, count=size), size)
+    return int(message_count), int(end)
+
+
+def sparse_index(buf, size: int, position: int, interval: int, bytes_since_index: int = 0,
+                 index_first: bool = False) -> Tuple[List[int], List[int], int]:
+    """
+    Compute sparse index entries for the log entries from position to size.
+    
+    Follows the same policy as LogSegment.append(): an entry for the first
+    message (if index_first) and then one each time at least interval bytes
+    have been written since the previous entry. Stops at a torn trailing entry.
+    
+    Args:
+        buf: Any object supporting the buffer protocol (e.g. an mmap)
+        size: Number of bytes of buf to scan
+        position: Byte position of the first entry to scan
+        interval: Index interval in bytes
+        bytes_since_index: Bytes already written since the last index entry
+        index_first: Whether the first scanned entry must be indexed
+        
+    Returns:
+        Tuple of (offsets relative to the first scanned entry, byte
+        positions, bytes written since the last entry at the end)
+    """
+    if numba is None or position >= size:
+        return _sparse_index_py(buf, size, position, interval, bytes_since_index, index_first)
+    
+    relative_offsets, positions, bytes_since_index = _sparse_index_jit(
+        np.frombuffer(buf, dtype=np.uint8, count=size),
+        size, position, interval, bytes_since_index, index_first
+    )
+    return relative_offsets.tolist(), positions.tolist(), int(bytes_since_index)
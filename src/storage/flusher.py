@@ -0,0 +1,156 @@
+"""
+BackgroundFlusher - Group commit for a Partition's log writes.
+
+Appends only write to the kernel; they are not forced to disk one message
+at a time. Instead, a background asyncio task syncs the partition
+(fdatasync) once FLUSH_INTERVAL_MS have passed since the first unsynced
+write, or as soon as MAX_PENDING_BYTES have accumulated, amortizing the
+cost of the disk flush across every write in the window.
+
+Callers that need to know their write is on disk (durable producers) can
+await wait_flushed() after appending.
+"""
+
+import asyncio
+from typing import Optional
+
+
+class BackgroundFlusher:
+    """
+    Coalesces disk syncs for a single partition into periodic group commits.
+    
+    The background task is started lazily from the running event loop on the
+    first notify(), so a Partition can be created outside of any loop (e.g.
+    in a worker thread). The sync itself runs in a worker thread so it never
+    blocks the event loop.
+    """
+    
+    # Sync at most this long after the first unsynced write
+    FLUSH_INTERVAL_MS = 10
+    
+    # Sync immediately once this many bytes are waiting
+    MAX_PENDING_BYTES = 64 * 1024
+    
+    def __init__(self, partition, interval_ms: Optional[int] = None,
+                 max_pending_bytes: Optional[int] = None):
+        """
+        Initialize a BackgroundFlusher.
+        
+        Args:
+            partition: The Partition whose sync() is called on each commit
+            interval_ms: Override the default sync interval
+            max_pending_bytes: Override the default pending-bytes threshold
+        """
+        self.partition = partition
+        self.interval = (interval_ms if interval_ms is not None else self.FLUSH_INTERVAL_MS) / 1000
+        self.max_pending_bytes = (
+            max_pending_bytes if max_pending_bytes is not None else self.MAX_PENDING_BYTES
+        )
+        self.pending_bytes = 0
+        
+        # Event loop state, created on first use
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._dirty: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._next_flush: Optional[asyncio.Future] = None
+        self._in_flight: Optional[asyncio.Future] = None
+    
+    def _ensure_started(self):
+        """Start the background task on the running loop if needed."""
+        if self._task is not None and not self._task.done():
+            return
+        
+        self._loop = asyncio.get_running_loop()
+        self._dirty = asyncio.Event()
+        self._full = asyncio.Event()
+        self._next_flush = self._loop.create_future()
+        self._in_flight = None
+        self._task = self._loop.create_task(self._run())
+    
+    def notify(self, nbytes: int):
+        """
+        Record that nbytes were written and still need syncing.
+        
+        Must be called from the event loop thread.
+        
+        Args:
+            nbytes: Number of bytes appended since the last notify
+        """
+        self._ensure_started()
+        
+        self.pending_bytes += nbytes
+        self._dirty.set()
+        
+        if self.pending_bytes >= self.max_pending_bytes:
+            self._full.set()
+    
+    async def wait_flushed(self):
+        """Wait until every write notified so far has been synced to disk."""
+        if self._next_flush is None:
+            return
+        
+        if self.pending_bytes > 0:
+            # Not picked up yet: wait for the next commit
+            commit = self._next_flush
+        elif self._in_flight is not None:
+            # Already part of the sync that is running now
+            commit = self._in_flight
+        else:
+            return
+        
+        # Shield so one cancelled waiter doesn't cancel the shared future
+        await asyncio.shield(commit)
+    
+    async def _run(self):
+        """Commit loop: wait for dirty data, then for the interval or a full buffer."""
+        try:
+            while True:
+                await self._dirty.wait()
+                
+                if self.pending_bytes < self.max_pending_bytes:
+                    try:
+                        await asyncio.wait_for(self._full.wait(), timeout=self.interval)
+                    except asyncio.TimeoutError:
+                        pass
+                
+                self._dirty.clear()
+                self._full.clear()
+                
+                # Writers notified from here on wait for the next commit
+                committed, self._next_flush = self._next_flush, self._loop.create_future()
+                synced_bytes, self.pending_bytes = self.pending_bytes, 0
+                self._in_flight = committed
+                
+                try:
+                    await asyncio.to_thread(self.partition.sync)
+                except Exception as e:
+                    # Leave the bytes pending so the next commit retries them
+                    self.pending_bytes += synced_bytes
+                    self._dirty.set()
+                    committed.set_exception(e)
+                else:
+                    committed.set_result(None)
+                finally:
+                    self._in_flight = None
+        except asyncio.CancelledError:
+            for commit in (self._in_flight, self._next_flush):
+                if commit is not None and not commit.done():
+                    commit.cancel()
+            raise
+    
+    def stop(self):
+        """
+        Stop the background task.
+        
+        Safe to call from any thread. The partition syncs its active segment
+        itself when it is closed.
+        """
+        if self._task is None or self._task.done():
+            return
+        
+        try:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        except RuntimeError:
+            # Event loop already closed
+            pass
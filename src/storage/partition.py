@@ -9,9 +9,13 @@ A Partition is responsible for:
 """
 
 import os
+from bisect import bisect_right
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Optional
+from threading import Lock
+from typing import List, Optional, Tuple
 from .segment import LogSegment
+from .flusher import BackgroundFlusher
 
 
 class Partition:
@@ -26,6 +30,15 @@ class Partition:
     # Using 1MB for production-like behavior, but can be set lower for testing
     SEGMENT_SIZE_LIMIT = 1 * 1024 * 1024  # 1MB in bytes
     
+    # Total bytes of recently consumed messages kept in memory. Past offsets
+    # never change in an append-only log, so cached entries never need
+    # invalidating
+    READ_CACHE_BYTES = 4 * 1024 * 1024  # 4MB
+    
+    # Larger messages are never cached, so a few big reads can't flush out
+    # the small tail-polled ones (or pin lots of memory)
+    READ_CACHE_MAX_MESSAGE_BYTES = 64 * 1024  # 64KB
+    
     def __init__(self, topic: str, partition_id: int, data_dir: str = "data", 
                  segment_size_limit: Optional[int] = None):
         """
@@ -50,12 +63,34 @@ class Partition:
         # Create partition-specific directory: data/{topic}-{partition_id}/
         self.partition_dir = self.base_data_dir / f"{topic}-{partition_id}"
         self.partition_dir.mkdir(parents=True, exist_ok=True)
+        self._partition_dir_str = str(self.partition_dir)
         
         # Segment management
         self.closed_segments: List[LogSegment] = []
         self.active_segment: Optional[LogSegment] = None
         self.next_offset = 0
         
+        # Segment metadata as parallel lists (one column per field) covering
+        # every segment (closed + active), so lookups bisect and bounds-check
+        # plain int lists instead of chasing LogSegment objects. The active
+        # segment's end offset is only finalized when it rolls.
+        self._base_offsets: List[int] = []
+        self._end_offsets: List[int] = []
+        self._segments_by_idx: List[LogSegment] = []
+        
+        # Serializes writers (and segment rolls) within this partition only;
+        # readers don't take it
+        self._write_lock = Lock()
+        
+        # LRU of offset -> message bytes for consumers re-polling the same offsets
+        self._read_cache: "OrderedDict[int, bytes]" = OrderedDict()
+        self._read_cache_bytes = 0
+        self._cache_lock = Lock()
+        
+        # Group-commit syncs for the active segment (started lazily on the
+        # event loop, since a Partition may be created outside of one)
+        self.flusher = BackgroundFlusher(self)
+        
         # Load existing segments from disk
         self._load_segments()
         
@@ -82,10 +117,13 @@ class Partition:
             base_offset = int(log_file.stem)
             
             # Create LogSegment instance
-            segment = LogSegment(base_offset=base_offset, data_dir=str(self.partition_dir))
+            segment = LogSegment(base_offset=base_offset, data_dir=self._partition_dir_str)
             
             # Add to closed segments (we'll move the last one to active later)
             self.closed_segments.append(segment)
+            self._segments_by_idx.append(segment)
+            self._end_offsets.append(segment.current_offset)
+            self._base_offsets.append(base_offset)
             
             # Update next_offset to be after this segment's current offset
             if segment.current_offset > self.next_offset:
@@ -94,6 +132,7 @@ class Partition:
         # Make the last segment the active one
         if self.closed_segments:
             self.active_segment = self.closed_segments.pop()
+            self.active_segment.preallocate(self.segment_size_limit)
             self.next_offset = self.active_segment.current_offset
     
     def _create_new_segment(self, base_offset: int):
@@ -103,15 +142,28 @@ class Partition:
         Args:
             base_offset: The starting offset for this new segment
         """
-        # Close the current active segment if it exists
+        # Close the current active segment if it exists, syncing any writes
+        # the background flusher hasn't committed yet and releasing its
+        # unused preallocated space
         if self.active_segment is not None:
+            self.active_segment.sync()
+            self.active_segment.trim()
             self.closed_segments.append(self.active_segment)
+            self._end_offsets[-1] = self.active_segment.current_offset
         
-        # Create new segment
-        self.active_segment = LogSegment(
+        # Create new segment, reserving its full size on disk up front
+        segment = LogSegment(
             base_offset=base_offset,
-            data_dir=str(self.partition_dir)
+            data_dir=self._partition_dir_str
         )
+        segment.preallocate(self.segment_size_limit)
+        self.active_segment = segment
+        
+        # Register the segment for lookups (base offset last so readers never
+        # see a base offset without the rest of its row)
+        self._segments_by_idx.append(self.active_segment)
+        self._end_offsets.append(base_offset)
+        self._base_offsets.append(base_offset)
     
     def _should_roll_segment(self) -> bool:
         """
@@ -123,14 +175,8 @@ class Partition:
         if self.active_segment is None:
             return False
         
-        # Get current size of the log file
-        log_file_path = self.partition_dir / f"{self.active_segment.base_offset:019d}.log"
-        
-        if not log_file_path.exists():
-            return False
-        
-        current_size = log_file_path.stat().st_size
-        return current_size >= self.segment_size_limit
+        # Size is tracked by the segment itself, no stat() per produce
+        return self.active_segment.size_bytes >= self.segment_size_limit
     
     def produce(self, message: bytes) -> int:
         """
@@ -144,24 +190,114 @@ class Partition:
         Returns:
             The offset assigned to this message
         """
-        # Check if we need to roll to a new segment
-        if self._should_roll_segment():
-            # Create new segment starting at the current offset
-            self._create_new_segment(base_offset=self.next_offset)
+        with self._write_lock:
+            # Check if we need to roll to a new segment
+            if self._should_roll_segment():
+                # Create new segment starting at the current offset
+                self._create_new_segment(base_offset=self.next_offset)
+            
+            # Append to active segment
+            offset = self.active_segment.append(message)
+            
+            # Update next offset
+            self.next_offset = offset + 1
+        
+        return offset
+    
+    def produce_batch(self, messages: List[bytes]) -> List[int]:
+        """
+        Append a batch of messages to the partition with a single write.
         
-        # Append to active segment
-        offset = self.active_segment.append(message)
+        The roll check happens once before the batch, so the whole batch
+        lands in one segment.
         
-        # Update next offset
-        self.next_offset = offset + 1
+        Args:
+            messages: The raw message bytes to append, in order
+            
+        Returns:
+            The offsets assigned to the messages
+        """
+        if not messages:
+            return []
         
-        return offset
+        with self._write_lock:
+            # Check if we need to roll to a new segment
+            if self._should_roll_segment():
+                self._create_new_segment(base_offset=self.next_offset)
+            
+            offsets = self.active_segment.append_many(messages)
+            
+            # Update next offset
+            self.next_offset = offsets[-1] + 1
+        
+        return offsets
+    
+    def sync(self):
+        """Force the active segment's writes to disk (one group commit)."""
+        active = self.active_segment
+        if active is not None:
+            active.sync()
+    
+    def _segment_for(self, offset: int) -> LogSegment:
+        """
+        Find the segment holding an offset.
+        
+        Goes straight to the active segment for tail reads, otherwise binary
+        searches the segment base offsets to find the owning segment.
+        
+        Args:
+            offset: The offset to look up
+            
+        Returns:
+            The LogSegment containing the offset
+            
+        Raises:
+            ValueError: If offset is not found in any segment
+        """
+        # Check if offset is out of range
+        if offset < 0 or offset >= self.next_offset:
+            raise ValueError(
+                f"Offset {offset} out of range [0, {self.next_offset})"
+            )
+        
+        # Fast path: tail reads hit the active segment
+        active = self.active_segment
+        if active is not None and offset >= active.base_offset:
+            return active
+        
+        # Find the last segment whose base offset is <= offset, and make sure
+        # the offset isn't past its end (e.g. a gap left by a missing file)
+        i = bisect_right(self._base_offsets, offset) - 1
+        if i < 0 or offset >= self._end_offsets[i]:
+            raise ValueError(f"Offset {offset} not found in any segment")
+        
+        return self._segments_by_idx[i]
+    
+    def cached(self, offset: int) -> Optional[bytes]:
+        """
+        Look up a message in the read cache without touching the segment.
+        
+        Never does I/O, so it is cheap enough to call from an event loop
+        before falling back to consume() in a worker thread.
+        
+        Args:
+            offset: The offset to look up
+            
+        Returns:
+            The cached message bytes, or None on a cache miss
+        """
+        with self._cache_lock:
+            message = self._read_cache.get(offset)
+            if message is not None:
+                self._read_cache.move_to_end(offset)
+            return message
     
     def consume(self, offset: int) -> bytes:
         """
         Read a message at the given offset.
         
-        Searches through all segments to find the one containing the offset.
+        Recently consumed offsets are served from an in-memory LRU cache
+        without touching the segment.
         
         Args:
             offset: The offset to read
@@ -172,23 +308,98 @@ class Partition:
         Raises:
             ValueError: If offset is not found in any segment
         """
-        # Check if offset is out of range
+        message = self.cached(offset)
+        if message is not None:
+            return message
+        
+        message = self._segment_for(offset).read(offset)
+        
+        if len(message) > self.READ_CACHE_MAX_MESSAGE_BYTES:
+            return message
+        
+        with self._cache_lock:
+            # Another reader may have cached it while we were reading
+            if offset not in self._read_cache:
+                self._read_cache[offset] = message
+                self._read_cache_bytes += len(message)
+                
+                # Evict least recently used entries until under budget
+                while self._read_cache_bytes > self.READ_CACHE_BYTES:
+                    _, evicted = self._read_cache.popitem(last=False)
+                    self._read_cache_bytes -= len(evicted)
+        
+        return message
+    
+    def consume_view(self, offset: int) -> memoryview:
+        """
+        Get a zero-copy view of the message at the given offset.
+        
+        See LogSegment.read_view() for the lifetime of the view.
+        
+        Args:
+            offset: The offset to read
+            
+        Returns:
+            Read-only memoryview of the message bytes
+            
+        Raises:
+            ValueError: If offset is not found in any segment
+        """
+        return self._segment_for(offset).read_view(offset)
+    
+    def consume_range(self, offset: int, max_messages: int) -> Tuple[List[memoryview], int]:
+        """
+        Read up to max_messages consecutive messages starting at offset.
+        
+        Messages are returned in their on-disk framing (4-byte big-endian
+        length followed by the body), one contiguous zero-copy view per
+        segment touched, so they can be streamed to a client without
+        re-encoding or copying.
+        
+        Args:
+            offset: The first offset to read
+            max_messages: Maximum number of messages to return
+            
+        Returns:
+            Tuple of (list of raw views, total number of messages)
+            
+        Raises:
+            ValueError: If offset is out of range
+        """
         if offset < 0 or offset >= self.next_offset:
             raise ValueError(
                 f"Offset {offset} out of range [0, {self.next_offset})"
             )
         
-        # First check closed segments (in order)
-        for segment in self.closed_segments:
-            if segment.base_offset <= offset < segment.current_offset:
-                return segment.read(offset)
+        chunks = []
+        count = 0
         
-        # Check active segment
-        if self.active_segment is not None:
-            if self.active_segment.base_offset <= offset < self.active_segment.current_offset:
-                return self.active_segment.read(offset)
+        # Start at the segment owning the offset and continue into later ones
+        i = bisect_right(self._base_offsets, offset) - 1
+        if i < 0:
+            raise ValueError(f"Offset {offset} not found in any segment")
         
-        raise ValueError(f"Offset {offset} not found in any segment")
+        while count < max_messages and i < len(self._segments_by_idx):
+            segment = self._segments_by_idx[i]
+            next_offset = offset + count
+            
+            # A later segment must pick up exactly where we stopped; if the
+            # previous one grew and rolled after we read it, stop here and
+            # return what we have rather than skipping messages
+            if next_offset < segment.base_offset:
+                break
+            
+            if next_offset < segment.current_offset:
+                chunk, read_count = segment.read_range(next_offset, max_messages - count)
+                chunks.append(chunk)
+                count += read_count
+                
+                # Re-read the same segment in case it grew meanwhile
+                continue
+            
+            i += 1
+        
+        return chunks, count
     
     def get_segment_count(self) -> int:
         """
@@ -219,32 +430,34 @@ class Partition:
         
         # Add closed segments
         for segment in self.closed_segments:
-            log_file = self.partition_dir / f"{segment.base_offset:019d}.log"
-            size = log_file.stat().st_size if log_file.exists() else 0
-            
             info["segments"].append({
                 "base_offset": segment.base_offset,
                 "current_offset": segment.current_offset,
-                "size_bytes": size,
+                "size_bytes": segment.size_bytes,
                 "status": "closed"
             })
         
         # Add active segment
         if self.active_segment is not None:
-            log_file = self.partition_dir / f"{self.active_segment.base_offset:019d}.log"
-            size = log_file.stat().st_size if log_file.exists() else 0
-            
             info["segments"].append({
                 "base_offset": self.active_segment.base_offset,
                 "current_offset": self.active_segment.current_offset,
-                "size_bytes": size,
+                "size_bytes": self.active_segment.size_bytes,
                 "status": "active"
             })
         
         return info
     
     def close(self):
-        """Close all segments."""
+        """
+        Sync the active segment and close all segments.
+        
+        The flusher task is only cancelled here, so a group commit may still
+        be syncing in a worker thread; each segment's close() waits for it.
+        """
+        self.flusher.stop()
+        self.sync()
+        
         for segment in self.closed_segments:
             segment.close()
         
@@ -0,0 +1,188 @@
+"""
+TopicRegistry - Tracks the open Partition for every topic-partition.
+
+The registry is split into shards, each a dict with its own lock, selected
+by hashing (topic, partition_id). Lookups and creations for different
+topics touch different shards, so there is no single hot lock once many
+topics are active. Writes within a partition are serialized separately by
+the Partition's own write lock.
+
+A topic -> partition keys index is maintained alongside the shards so
+per-topic questions (which topics exist, which partitions a topic has) are
+answered without walking every partition.
+"""
+
+from threading import Lock
+from typing import Dict, List, Optional, Set, Tuple
+
+from .partition import Partition
+
+
+class TopicRegistry:
+    """
+    Sharded map of (topic, partition_id) -> Partition.
+    
+    Reads go straight to the shard dict; the shard lock is only taken when a
+    partition is created or removed.
+    """
+    
+    # Number of independent shards
+    NUM_SHARDS = 16
+    
+    def __init__(self, data_dir: str = "data", segment_size_limit: Optional[int] = None,
+                 num_shards: Optional[int] = None):
+        """
+        Initialize a TopicRegistry.
+        
+        Args:
+            data_dir: Base directory passed to every Partition
+            segment_size_limit: Segment size limit passed to every Partition
+            num_shards: Override the default number of shards
+        """
+        self.data_dir = data_dir
+        self.segment_size_limit = segment_size_limit
+        
+        shard_count = num_shards if num_shards is not None else self.NUM_SHARDS
+        self._shards: List[Dict[Tuple[str, int], Partition]] = [{} for _ in range(shard_count)]
+        self._shard_locks: List[Lock] = [Lock() for _ in range(shard_count)]
+        
+        # Topic -> keys of its partitions, plus the total partition count
+        self._topic_to_keys: Dict[str, Set[Tuple[str, int]]] = {}
+        self._partition_count = 0
+        self._topic_lock = Lock()
+    
+    def _shard_index(self, topic: str, partition_id: int) -> int:
+        """Pick the shard responsible for a topic-partition."""
+        return hash((topic, partition_id)) % len(self._shards)
+    
+    def get(self, topic: str, partition_id: int = 0) -> Optional[Partition]:
+        """
+        Get an existing partition.
+        
+        Args:
+            topic: Topic name
+            partition_id: Partition ID (default: 0)
+            
+        Returns:
+            The Partition, or None if it hasn't been created
+        """
+        shard = self._shards[self._shard_index(topic, partition_id)]
+        return shard.get((topic, partition_id))
+    
+    def get_or_create(self, topic: str, partition_id: int = 0) -> Partition:
+        """
+        Get an existing partition or create a new one.
+        
+        Args:
+            topic: Topic name
+            partition_id: Partition ID (default: 0)
+            
+        Returns:
+            Partition instance
+        """
+        key = (topic, partition_id)
+        i = self._shard_index(topic, partition_id)
+        shard = self._shards[i]
+        
+        # Fast path without the lock
+        partition = shard.get(key)
+        if partition is not None:
+            return partition
+        
+        with self._shard_locks[i]:
+            # Another caller may have created it while we waited
+            partition = shard.get(key)
+            if partition is None:
+                partition = Partition(
+                    topic,
+                    partition_id,
+                    data_dir=self.data_dir,
+                    segment_size_limit=self.segment_size_limit
+                )
+                shard[key] = partition
+                
+                with self._topic_lock:
+                    self._topic_to_keys.setdefault(topic, set()).add(key)
+                    self._partition_count += 1
+        
+        return partition
+    
+    def remove_topic(self, topic: str) -> List[Partition]:
+        """
+        Remove every partition of a topic from the registry.
+        
+        The partitions are not closed; that is left to the caller.
+        
+        Args:
+            topic: Topic name
+            
+        Returns:
+            The removed partitions (empty if the topic wasn't registered)
+        """
+        with self._topic_lock:
+            keys = self._topic_to_keys.pop(topic, set())
+            self._partition_count -= len(keys)
+        
+        removed = []
+        
+        # Only visit the shards that actually hold this topic's partitions
+        for key in keys:
+            i = self._shard_index(*key)
+            with self._shard_locks[i]:
+                partition = self._shards[i].pop(key, None)
+            if partition is not None:
+                removed.append(partition)
+        
+        return removed
+    
+    def topics(self) -> List[str]:
+        """
+        Get the names of all registered topics.
+        
+        Returns:
+            List of topic names
+        """
+        return list(self._topic_to_keys)
+    
+    def topic_count(self) -> int:
+        """
+        Get the number of registered topics.
+        
+        Returns:
+            Topic count
+        """
+        return len(self._topic_to_keys)
+    
+    def partitions_of(self, topic: str) -> List[Partition]:
+        """
+        Get the registered partitions of a topic.
+        
+        Args:
+            topic: Topic name
+            
+        Returns:
+            List of Partition instances (empty if the topic isn't registered)
+        """
+        partitions = []
+        
+        for key in list(self._topic_to_keys.get(topic, ())):
+            partition = self.get(*key)
+            if partition is not None:
+                partitions.append(partition)
+        
+        return partitions
+    
+    def partitions(self) -> List[Partition]:
+        """
+        Get a snapshot of all registered partitions.
+        
+        Returns:
+            List of Partition instances
+        """
+        return [partition for shard in self._shards for partition in list(shard.values())]
+    
+    def __len__(self):
+        return self._partition_count
+    
+    def __repr__(self):
+        return f"TopicRegistry(partitions={len(self)}, shards={len(self._shards)})"
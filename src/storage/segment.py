@@ -15,9 +15,64 @@ Binary Format:
   Index entries are written every INDEX_INTERVAL bytes to enable fast lookups.
 """
 
+import ctypes
+import mmap
 import os
 import struct
+import sys
+from bisect import bisect_right
 from pathlib import Path
+from threading import Lock
+from typing import List, Optional, Tuple
+
+from ._scan import count_messages, sparse_index
+
+
+# Precompiled codecs so hot paths don't re-parse the format strings
+_LEN_STRUCT = struct.Struct(">I")    # Log entry length prefix
+_IDX_STRUCT = struct.Struct(">II")   # Index entry (relative offset, position)
+
+# Scatter-gather writes are POSIX-only (not available on Windows)
+_HAS_WRITEV = hasattr(os, "writev")
+
+# fdatasync skips the inode metadata flush; not available on every platform
+_datasync = getattr(os, "fdatasync", os.fsync)
+
+# fallocate() mode flag: reserve blocks without changing the file size
+_FALLOC_FL_KEEP_SIZE = 0x01
+
+
+def _load_fallocate():
+    """
+    Look up Linux fallocate() through ctypes.
+    
+    os.posix_fallocate() can't be used: it grows the visible file size, which
+    would push O_APPEND writes past the reserved space and make the zeroed
+    tail look like empty messages on recovery. FALLOC_FL_KEEP_SIZE reserves
+    the blocks while leaving the size untouched.
+    
+    Returns:
+        The fallocate function, or None where it isn't available
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+    except OSError:
+        return None
+    
+    for name in ("fallocate64", "fallocate"):
+        fallocate = getattr(libc, name, None)
+        if fallocate is not None:
+            fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+            fallocate.restype = ctypes.c_int
+            return fallocate
+    
+    return None
+
+
+_fallocate = _load_fallocate()
 
 
 class LogSegment:
@@ -45,59 +100,160 @@ class LogSegment:
         self.current_offset = base_offset
         self.bytes_since_last_index = 0
         
+        # Size of the .log file, tracked in-process so callers don't need a stat()
+        self.size_bytes = 0
+        
+        # Reusable buffer for packing length prefixes in append()
+        self._scratch = bytearray(_LEN_STRUCT.size)
+        
         # Create data directory if it doesn't exist
         self.data_dir.mkdir(parents=True, exist_ok=True)
         
-        # Generate file names (e.g., 0000000000000000000.log)
+        # Generate file names once (e.g., 0000000000000000000.log) so nothing
+        # has to re-format them later
         segment_name = f"{base_offset:019d}"
-        log_path = self.data_dir / f"{segment_name}.log"
-        index_path = self.data_dir / f"{segment_name}.index"
-        
-        # Open files in append+binary mode ('ab+' allows read and append)
-        self.log_file = open(log_path, 'ab+')
-        self.index_file = open(index_path, 'ab+')
-        
-        # Track the current position in the log file
-        self.log_file.seek(0, os.SEEK_END)
+        self.log_path = self.data_dir / f"{segment_name}.log"
+        self.index_path = self.data_dir / f"{segment_name}.index"
+        self._log_path_str = str(self.log_path)
+        
+        # The log is a raw O_APPEND descriptor: appends go through os.write()
+        # and reads through an mmap of the same file, so the writer and
+        # readers never share (or fight over) a file position
+        flags = os.O_RDWR | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0)
+        self._fd = os.open(self._log_path_str, flags, 0o644)
+        self._log_map: Optional[mmap.mmap] = None
+        
+        # Serializes sync() and close() so an fdatasync running in a worker
+        # thread never sees a closed (or already reused) descriptor
+        self._fd_lock = Lock()
+        self._preallocated = False
+        
+        # Open index in append+binary mode ('ab+' allows read and append)
+        self.index_file = open(self.index_path, 'ab+')
         self.last_indexed_position = 0
         
         # Recover current offset by scanning the log file
         self._recover_offset()
+        
+        # Load the sparse index into memory for binary search in read()
+        self._index_rel: list = []
+        self._index_pos: list = []
+        self._load_index()
     
     def _recover_offset(self):
         """
         Recover the current offset by scanning the log file.
         
         This is needed when loading an existing segment from disk to determine
-        where writing should resume.
+        where writing should resume. A torn record left by a crash mid-write
+        is cut off so new appends start right after the last complete one.
         """
-        # Seek to beginning of log file
-        self.log_file.seek(0)
+        log_size = os.lseek(self._fd, 0, os.SEEK_END)
         
-        # Count messages in the file
+        # Count messages by walking the length prefixes of an mmap'd view
+        # (compiled with numba when available)
         message_count = 0
+        valid_size = 0
         
-        while True:
-            # Try to read length prefix
-            length_bytes = self.log_file.read(4)
-            
-            if len(length_bytes) < 4:
-                # End of file or corrupted
-                break
-            
-            # Unpack length
-            message_length = struct.unpack(">I", length_bytes)[0]
-            
-            # Skip over the message body
-            self.log_file.seek(message_length, os.SEEK_CUR)
-            
-            message_count += 1
+        if log_size > 0:
+            with mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ) as log_map:
+                message_count, valid_size = count_messages(log_map, log_size)
+        
+        # Drop the torn tail, if any
+        if valid_size < log_size:
+            os.ftruncate(self._fd, valid_size)
+        
+        self.size_bytes = valid_size
         
         # Update current offset
         self.current_offset = self.base_offset + message_count
+    
+    def _load_index(self):
+        """
+        Load the sparse index file into the in-memory lookup arrays.
         
-        # Seek back to end for appending
-        self.log_file.seek(0, os.SEEK_END)
+        Entries that point past the recovered end of the log (e.g. left behind
+        by a crash between the log and index writes) are truncated away so
+        new entries are appended after a valid prefix. Log entries written
+        after the last valid index entry (or all of them, if the .index file
+        is missing) are then re-indexed.
+        """
+        self.index_file.seek(0, os.SEEK_END)
+        index_size = self.index_file.tell()
+        
+        if index_size >= 8:
+            with mmap.mmap(self.index_file.fileno(), 0, access=mmap.ACCESS_READ) as index_map:
+                usable = index_size - (index_size % 8)
+                message_count = self.current_offset - self.base_offset
+                
+                for relative_offset, file_position in _IDX_STRUCT.iter_unpack(index_map[:usable]):
+                    if relative_offset >= message_count:
+                        break
+                    self._index_rel.append(relative_offset)
+                    self._index_pos.append(file_position)
+        
+        # Drop any stale or partial trailing entries
+        valid_size = len(self._index_rel) * 8
+        if valid_size < index_size:
+            self.index_file.truncate(valid_size)
+        
+        self.index_file.seek(0, os.SEEK_END)
+        self._rebuild_index_tail()
+    
+    def _rebuild_index_tail(self):
+        """
+        Index the log entries after the last index entry.
+        
+        Also restores bytes_since_last_index so appends keep the usual
+        INDEX_INTERVAL spacing after a restart.
+        """
+        if self.size_bytes == 0:
+            return
+        
+        with mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ) as log_map:
+            if self._index_rel:
+                # Resume right after the last indexed entry
+                last_position = self._index_pos[-1]
+                if last_position + 4 > self.size_bytes:
+                    return
+                position = last_position + 4 + _LEN_STRUCT.unpack_from(log_map, last_position)[0]
+                next_relative_offset = self._index_rel[-1] + 1
+                index_first = False
+            else:
+                position = 0
+                next_relative_offset = 0
+                index_first = True
+            
+            relative_offsets, positions, self.bytes_since_last_index = sparse_index(
+                log_map, self.size_bytes, position, self.INDEX_INTERVAL, 0, index_first
+            )
+        
+        if not positions:
+            return
+        
+        # Persist the rebuilt entries with a single write
+        relative_offsets = [next_relative_offset + r for r in relative_offsets]
+        self.index_file.write(b"".join(
+            _IDX_STRUCT.pack(r, p) for r, p in zip(relative_offsets, positions)
+        ))
+        self.index_file.flush()
+        
+        self._index_rel.extend(relative_offsets)
+        self._index_pos.extend(positions)
+        self.last_indexed_position = positions[-1]
+    
+    @staticmethod
+    def record_size(message: bytes) -> int:
+        """
+        Number of log bytes append() writes for a message.
+        
+        Args:
+            message: The raw message bytes
+            
+        Returns:
+            Length prefix plus body size in bytes
+        """
+        return _LEN_STRUCT.size + len(message)
     
     def append(self, message: bytes) -> int:
         """
@@ -113,8 +269,8 @@ class LogSegment:
         Returns:
             The offset assigned to this message
         """
-        # Get current file position before writing
-        file_position = self.log_file.tell()
+        # O_APPEND writes always land at the current end of the log
+        file_position = self.size_bytes
         
         # Calculate message length
         message_length = len(message)
@@ -122,23 +278,18 @@ class LogSegment:
         # Pack length as 4-byte big-endian unsigned integer (">I")
         # ">" = big-endian (network byte order)
         # "I" = unsigned int (4 bytes)
-        length_bytes = struct.pack(">I", message_length)
-        
-        # Write length prefix
-        self.log_file.write(length_bytes)
-        
-        # Write message body
-        self.log_file.write(message)
+        _LEN_STRUCT.pack_into(self._scratch, 0, message_length)
         
-        # Flush to ensure data is written to disk
-        self.log_file.flush()
+        # Write length prefix and message body with a single syscall
+        bytes_written = self.record_size(message)
+        self._write(self._scratch, message)
         
         # Track bytes written
-        bytes_written = 4 + message_length
+        self.size_bytes += bytes_written
         self.bytes_since_last_index += bytes_written
         
-        # Write index entry every INDEX_INTERVAL bytes
-        if self.bytes_since_last_index >= self.INDEX_INTERVAL:
+        # Write index entry for the first message and then every INDEX_INTERVAL bytes
+        if not self._index_rel or self.bytes_since_last_index >= self.INDEX_INTERVAL:
             self._write_index_entry(self.current_offset, file_position)
             self.bytes_since_last_index = 0
         
@@ -148,6 +299,142 @@ class LogSegment:
         
         return assigned_offset
     
+    def append_many(self, messages: List[bytes]) -> List[int]:
+        """
+        Append a batch of messages with a single write.
+        
+        The length-prefixed entries are built in one buffer so the whole batch
+        costs one write() instead of one per message.
+        
+        Args:
+            messages: The raw message bytes to append, in order
+            
+        Returns:
+            The offsets assigned to the messages
+        """
+        file_position = self.size_bytes
+        offsets = list(range(self.current_offset, self.current_offset + len(messages)))
+        
+        buffer = bytearray()
+        index_entries = []
+        needs_first_entry = not self._index_rel
+        
+        for offset, message in zip(offsets, messages):
+            message_position = file_position + len(buffer)
+            message_length = len(message)
+            
+            buffer += _LEN_STRUCT.pack(message_length)
+            buffer += message
+            self.bytes_since_last_index += 4 + message_length
+            
+            # Index the first message and then every INDEX_INTERVAL bytes
+            if needs_first_entry or self.bytes_since_last_index >= self.INDEX_INTERVAL:
+                index_entries.append((offset, message_position))
+                self.bytes_since_last_index = 0
+                needs_first_entry = False
+        
+        self._write(buffer)
+        self.size_bytes += len(buffer)
+        
+        # Index entries go in only after the data they point at
+        for offset, message_position in index_entries:
+            self._write_index_entry(offset, message_position)
+        
+        self.current_offset += len(offsets)
+        
+        return offsets
+    
+    def _write(self, *chunks):
+        """
+        Append raw bytes to the log file with a single syscall.
+        
+        Uses writev() so the chunks (e.g. length prefix and body) go out
+        together without first being joined into a new buffer; falls back
+        to one joined write() where writev() isn't available.
+        
+        Raises:
+            OSError: If the kernel accepted fewer bytes than requested. The
+                partial record is truncated away first, so the log still
+                ends at size_bytes and later appends stay correctly indexed.
+        """
+        if _HAS_WRITEV:
+            written = os.writev(self._fd, chunks)
+        else:
+            written = os.write(self._fd, b"".join(chunks))
+        
+        expected = sum(len(chunk) for chunk in chunks)
+        if written != expected:
+            os.ftruncate(self._fd, self.size_bytes)
+            raise OSError(f"Short write to log: {written} of {expected} bytes")
+    
+    def sync(self):
+        """
+        Force appended log data to disk.
+        
+        append() only hands data to the kernel; this is the (comparatively
+        expensive) durability point, meant to be called once per group commit
+        rather than per message. Uses fdatasync where available. The index
+        needs no sync since it is rebuilt from the log on load.
+        
+        A sync racing with close() either finishes first or finds the
+        segment closed and does nothing.
+        """
+        with self._fd_lock:
+            if self._fd >= 0:
+                _datasync(self._fd)
+    
+    def preallocate(self, size_limit: int) -> bool:
+        """
+        Reserve disk blocks for the log up to size_limit bytes.
+        
+        Gives the segment one contiguous extent up front instead of allocating
+        blocks (and updating filesystem metadata) on every write. The file
+        size is not changed, so appends and recovery work as before. This is
+        best-effort: it does nothing where fallocate() is unavailable or the
+        filesystem doesn't support it.
+        
+        Args:
+            size_limit: Total log size to reserve space for
+            
+        Returns:
+            True if space was reserved
+        """
+        remaining = size_limit - self.size_bytes
+        
+        if _fallocate is None or remaining <= 0:
+            return False
+        
+        if _fallocate(self._fd, _FALLOC_FL_KEEP_SIZE, self.size_bytes, remaining) != 0:
+            return False
+        
+        self._preallocated = True
+        return True
+    
+    def trim(self):
+        """
+        Release any preallocated space past the end of the log.
+        
+        Called when the segment stops being written to (on roll or close).
+        """
+        if self._preallocated:
+            os.ftruncate(self._fd, self.size_bytes)
+            self._preallocated = False
+    
+    def _map(self) -> mmap.mmap:
+        """
+        Get a read-only mmap covering everything appended so far.
+        
+        The file is re-mapped lazily once it has grown past the current
+        mapping. Older mappings stay valid for readers still holding them.
+        """
+        log_map = self._log_map
+        
+        if log_map is None or len(log_map) < self.size_bytes:
+            log_map = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+            self._log_map = log_map
+        
+        return log_map
+    
     def _write_index_entry(self, offset: int, file_position: int):
         """
         Write an index entry to the index file.
@@ -160,21 +447,84 @@ class LogSegment:
         relative_offset = offset - self.base_offset
         
         # Pack both as 4-byte big-endian unsigned integers
-        index_entry = struct.pack(">II", relative_offset, file_position)
+        index_entry = _IDX_STRUCT.pack(relative_offset, file_position)
         
         # Write to index file
         self.index_file.write(index_entry)
         self.index_file.flush()
         
+        # Keep the in-memory lookup arrays in sync with the file
+        self._index_rel.append(relative_offset)
+        self._index_pos.append(file_position)
+        
         self.last_indexed_position = file_position
     
+    def _skip(self, log_map: mmap.mmap, position: int, count: int, offset: int) -> int:
+        """
+        Walk past count entries of the log starting at position.
+        
+        Args:
+            log_map: Mapped view of the log file
+            position: Byte position of the first entry to skip
+            count: Number of entries to skip
+            offset: The offset being looked up (for error messages)
+            
+        Returns:
+            The byte position just after the last skipped entry
+            
+        Raises:
+            ValueError: If the log ends before count entries were found
+        """
+        end = len(log_map)
+        
+        for _ in range(count):
+            # A full length prefix must fit before the end of the log
+            if position + 4 > end:
+                raise ValueError(f"Offset {offset} not found (corrupted log)")
+            
+            position += 4 + _LEN_STRUCT.unpack_from(log_map, position)[0]
+        
+        if position > end:
+            raise ValueError(f"Offset {offset} not found (corrupted log)")
+        
+        return position
+    
+    def _locate(self, log_map: mmap.mmap, offset: int) -> int:
+        """
+        Find the byte position of the entry for an offset.
+        
+        Uses the sparse index to jump to the closest preceding entry, then
+        skips forward at most INDEX_INTERVAL bytes to reach the target.
+        
+        Args:
+            log_map: Mapped view of the log file
+            offset: The absolute offset (must be within the segment)
+            
+        Returns:
+            The byte position of the entry in the log file
+            
+        Raises:
+            ValueError: If the log ends before the offset is reached
+        """
+        # Binary search the index for the last entry at or before the target
+        relative_offset = offset - self.base_offset
+        i = bisect_right(self._index_rel, relative_offset) - 1
+        
+        if i >= 0:
+            indexed_offset = self.base_offset + self._index_rel[i]
+            position = self._index_pos[i]
+        else:
+            # No usable index entry (e.g. segment written by an older version)
+            indexed_offset = self.base_offset
+            position = 0
+        
+        # Skip entries from the indexed position up to the target offset
+        return self._skip(log_map, position, offset - indexed_offset, offset)
+    
     def read(self, offset: int) -> bytes:
         """
         Read a message at the given offset.
         
-        This is a simple linear scan implementation. In production, we would
-        use the index file to jump close to the target offset, then scan.
-        
         Args:
             offset: The absolute offset to read
             
@@ -189,41 +539,85 @@ class LogSegment:
                 f"Offset {offset} out of range [{self.base_offset}, {self.current_offset})"
             )
         
-        # Seek to beginning of log file
-        self.log_file.seek(0)
+        log_map = self._map()
+        position = self._locate(log_map, offset)
+        end = self._skip(log_map, position, 1, offset)
         
-        # Scan through messages to find the target offset
-        current_scan_offset = self.base_offset
+        # Message body follows the 4-byte length prefix
+        return log_map[position + 4:end]
+    
+    def read_view(self, offset: int) -> memoryview:
+        """
+        Get a zero-copy view of the message at the given offset.
         
-        while current_scan_offset <= offset:
-            # Read length prefix (4 bytes)
-            length_bytes = self.log_file.read(4)
-            
-            if len(length_bytes) < 4:
-                raise ValueError(f"Offset {offset} not found (corrupted log)")
-            
-            # Unpack length
-            message_length = struct.unpack(">I", length_bytes)[0]
+        The view points straight into the segment's mmap, so large messages
+        can be streamed out without being copied into a bytes object. The
+        mapping stays alive for as long as the view is referenced.
+        
+        Args:
+            offset: The absolute offset to read
             
-            # Read message body
-            message = self.log_file.read(message_length)
+        Returns:
+            Read-only memoryview of the message bytes
             
-            if len(message) < message_length:
-                raise ValueError(f"Offset {offset} not found (corrupted log)")
+        Raises:
+            ValueError: If offset is out of range or not found
+        """
+        if offset < self.base_offset or offset >= self.current_offset:
+            raise ValueError(
+                f"Offset {offset} out of range [{self.base_offset}, {self.current_offset})"
+            )
+        
+        log_map = self._map()
+        position = self._locate(log_map, offset)
+        end = self._skip(log_map, position, 1, offset)
+        
+        return memoryview(log_map)[position + 4:end]
+    
+    def read_range(self, offset: int, max_messages: int) -> Tuple[memoryview, int]:
+        """
+        Read up to max_messages consecutive entries starting at offset.
+        
+        The entries are returned exactly as stored (length-prefixed), as a
+        zero-copy view of one contiguous region of the log.
+        
+        Args:
+            offset: The absolute offset of the first entry
+            max_messages: Maximum number of entries to return
             
-            # If this is the target offset, return it
-            if current_scan_offset == offset:
-                return message
+        Returns:
+            Tuple of (raw length-prefixed entries, number of entries)
             
-            # Move to next message
-            current_scan_offset += 1
+        Raises:
+            ValueError: If offset is out of range or the log is corrupted
+        """
+        if offset < self.base_offset or offset >= self.current_offset:
+            raise ValueError(
+                f"Offset {offset} out of range [{self.base_offset}, {self.current_offset})"
+            )
+        
+        count = min(max_messages, self.current_offset - offset)
+        
+        log_map = self._map()
+        start = self._locate(log_map, offset)
+        end = self._skip(log_map, start, count, offset)
         
-        raise ValueError(f"Offset {offset} not found")
+        return memoryview(log_map)[start:end], count
     
     def close(self):
-        """Close the log and index files."""
-        if self.log_file:
-            self.log_file.close()
+        """Close the log and index files, waiting for an in-flight sync()."""
+        if self._log_map is not None:
+            try:
+                self._log_map.close()
+            except BufferError:
+                # A reader still holds a view; the map is freed with it
+                pass
+            self._log_map = None
+        with self._fd_lock:
+            if self._fd >= 0:
+                self.trim()
+                os.close(self._fd)
+                self._fd = -1
         if self.index_file:
             self.index_file.close()
     
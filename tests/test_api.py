@@ -0,0 +1,39 @@
+"""Tests for the HTTP API."""
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from api import server
+from storage.registry import TopicRegistry
+from storage.segment import LogSegment
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "registry", TopicRegistry(data_dir=str(tmp_path)))
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+
+@pytest.mark.parametrize("durable", ["1", "true"])
+def test_durable_produce_waits_for_sync(client, monkeypatch, durable):
+    synced = []
+    original_sync = LogSegment.sync
+    
+    def recording_sync(segment):
+        original_sync(segment)
+        synced.append(segment.current_offset)
+    
+    monkeypatch.setattr(LogSegment, "sync", recording_sync)
+    
+    response = client.post(f"/produce?durable={durable}", json={"topic": "events", "message": "hello"})
+    
+    assert response.status_code == 200
+    assert response.json()["offset"] == 0
+    
+    # A sync covering the new message finished before the response
+    assert synced and synced[-1] >= 1
@@ -0,0 +1,111 @@
+"""Tests for BackgroundFlusher group commits."""
+
+import asyncio
+import threading
+
+import pytest
+
+from storage.flusher import BackgroundFlusher
+
+
+class FakePartition:
+    """Stands in for a Partition and records every sync() call."""
+    
+    def __init__(self, block_first=False, fail_first=False):
+        self.started = 0
+        self.finished = 0
+        self.sync_started = threading.Event()
+        self.release = threading.Event()
+        if not block_first:
+            self.release.set()
+        self.fail_first = fail_first
+    
+    def sync(self):
+        self.started += 1
+        self.sync_started.set()
+        self.release.wait(timeout=5)
+        
+        if self.fail_first and self.started == 1:
+            raise OSError("disk full")
+        
+        self.finished += 1
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, timeout=5))
+
+
+def test_wait_flushed_waits_for_a_sync_started_after_the_write():
+    partition = FakePartition()
+    
+    async def scenario():
+        flusher = BackgroundFlusher(partition, interval_ms=5)
+        
+        flusher.notify(10)
+        await flusher.wait_flushed()
+        assert partition.finished == 1
+        
+        # A second write needs a second sync, not the one already done
+        flusher.notify(10)
+        syncs_before_write = partition.started
+        await flusher.wait_flushed()
+        assert partition.started > syncs_before_write
+        assert partition.finished == partition.started
+        
+        flusher.stop()
+    
+    run(scenario())
+
+
+def test_write_during_in_flight_sync_waits_for_next_commit():
+    partition = FakePartition(block_first=True)
+    
+    async def scenario():
+        flusher = BackgroundFlusher(partition, interval_ms=5)
+        
+        flusher.notify(10)
+        first_waiter = asyncio.ensure_future(flusher.wait_flushed())
+        assert await asyncio.to_thread(partition.sync_started.wait, 5)
+        
+        # This write missed the sync that is already running
+        flusher.notify(10)
+        finished_when_woken = []
+        
+        async def second_write():
+            await flusher.wait_flushed()
+            finished_when_woken.append(partition.finished)
+        
+        second_waiter = asyncio.ensure_future(second_write())
+        await asyncio.sleep(0.05)
+        assert not first_waiter.done()
+        assert not second_waiter.done()
+        
+        partition.release.set()
+        await first_waiter
+        await second_waiter
+        
+        assert finished_when_woken == [2]
+        flusher.stop()
+    
+    run(scenario())
+
+
+def test_failed_sync_reaches_waiter_and_is_retried():
+    partition = FakePartition(fail_first=True)
+    
+    async def scenario():
+        flusher = BackgroundFlusher(partition, interval_ms=5)
+        
+        flusher.notify(10)
+        with pytest.raises(OSError, match="disk full"):
+            await flusher.wait_flushed()
+        
+        # The unsynced bytes stay pending and the next commit retries them
+        await flusher.wait_flushed()
+        assert partition.started == 2
+        assert partition.finished == 1
+        assert flusher.pending_bytes == 0
+        
+        flusher.stop()
+    
+    run(scenario())
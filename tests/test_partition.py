@@ -0,0 +1,108 @@
+"""Tests for Partition."""
+
+import struct
+
+import pytest
+
+from storage.partition import Partition
+
+
+def _decode(chunks):
+    """Split length-prefixed consume_range() output back into messages."""
+    data = b"".join(chunks)
+    messages = []
+    position = 0
+    
+    while position < len(data):
+        (length,) = struct.unpack_from(">I", data, position)
+        messages.append(data[position + 4:position + 4 + length])
+        position += 4 + length
+    
+    return messages
+
+
+def test_consume_range_spans_segments(tmp_path):
+    partition = Partition("events", 0, data_dir=str(tmp_path), segment_size_limit=64)
+    messages = [f"message-{i}".encode() for i in range(50)]
+    for message in messages:
+        partition.produce(message)
+    
+    assert partition.get_segment_count() > 1
+    
+    chunks, count = partition.consume_range(3, 40)
+    
+    assert count == 40
+    assert _decode(chunks) == messages[3:43]
+    partition.close()
+
+
+def test_consume_range_segment_rolls_during_read(tmp_path):
+    partition = Partition("events", 0, data_dir=str(tmp_path), segment_size_limit=64)
+    messages = [f"message-{i}".encode() for i in range(3)]
+    for message in messages:
+        partition.produce(message)
+    
+    segment = partition.active_segment
+    original_read_range = segment.read_range
+    
+    def read_then_roll(offset, max_messages):
+        # Grow the segment past the size limit and roll it after it was read
+        result = original_read_range(offset, max_messages)
+        while partition.get_segment_count() == 1:
+            messages.append(f"message-{len(messages)}".encode())
+            partition.produce(messages[-1])
+        return result
+    
+    segment.read_range = read_then_roll
+    
+    chunks, count = partition.consume_range(0, 100)
+    
+    # Everything returned is contiguous from the requested offset
+    assert count >= 3
+    assert _decode(chunks) == messages[:count]
+    partition.close()
+
+
+def test_consume_range_rejects_offset_before_first_segment(tmp_path):
+    partition_dir = tmp_path / "events-0"
+    partition = Partition("events", 0, data_dir=str(tmp_path))
+    partition.produce(b"hello")
+    partition.close()
+    
+    # A partition whose first segment starts past offset 0
+    (partition_dir / "0000000000000000000.log").rename(partition_dir / "0000000000000000005.log")
+    (partition_dir / "0000000000000000000.index").unlink()
+    partition = Partition("events", 0, data_dir=str(tmp_path))
+    
+    with pytest.raises(ValueError):
+        partition.consume_range(2, 10)
+    partition.close()
+
+
+def test_read_cache_is_bounded_by_bytes(tmp_path):
+    partition = Partition("events", 0, data_dir=str(tmp_path))
+    partition.READ_CACHE_BYTES = 1000
+    partition.READ_CACHE_MAX_MESSAGE_BYTES = 300
+    
+    for i in range(20):
+        partition.produce(bytes([i]) * 100)
+    big_offset = partition.produce(b"x" * 500)
+    
+    for offset in range(21):
+        partition.consume(offset)
+    
+    # Only the most recent small messages that fit the budget are kept
+    assert partition._read_cache_bytes <= 1000
+    assert sum(len(m) for m in partition._read_cache.values()) == partition._read_cache_bytes
+    assert list(partition._read_cache) == list(range(10, 20))
+    assert big_offset not in partition._read_cache
+    
+    # The non-blocking probe only reports hits
+    assert partition.cached(15) == bytes([15]) * 100
+    assert partition.cached(0) is None
+    assert partition.cached(big_offset) is None
+    
+    # Cached and uncached reads return the same data
+    assert partition.consume(15) == bytes([15]) * 100
+    assert partition.consume(0) == bytes([0]) * 100
+    partition.close()